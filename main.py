@@ -1,48 +1,284 @@
 import random
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from matplotlib.figure import Figure
-from itertools import compress
+from itertools import product
 
-from fastnumbers import fast_real
-
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-from mpl_toolkits.mplot3d import Axes3D
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from pyarrow import feather
 from PyQt5 import QtWidgets, QtCore, QtGui
+import pyqtgraph.opengl as gl
+import h5py
 import zipfile
+import io
+import os
+import hashlib
 import traceback, sys
-import re
-
-from braid_analysis import braid_slicing
+try:
+    from isal import igzip  # SIMD-accelerated inflate, same API as stdlib gzip
+except ImportError:
+    igzip = None
+try:
+    import rapidgzip  # parallel, index-able inflate for big files
+except ImportError:
+    rapidgzip = None
+
+# matplotlib's default 'tab10' cycle, as RGBA floats for the GL line items
+TRACE_COLORS = [
+    (0.122, 0.467, 0.706, 1.), (1.000, 0.498, 0.055, 1.), (0.173, 0.627, 0.173, 1.), (0.839, 0.153, 0.157, 1.),
+    (0.580, 0.404, 0.741, 1.), (0.549, 0.337, 0.294, 1.), (0.890, 0.467, 0.761, 1.), (0.498, 0.498, 0.498, 1.),
+    (0.737, 0.741, 0.133, 1.), (0.090, 0.745, 0.812, 1.),
+]
+
+# the only kalman_estimates columns used by the GUI, and the (narrowest safe) dtypes they're read as
+KALMAN_DTYPES = {'obj_id': np.uint32, 'x': np.float32, 'y': np.float32, 'z': np.float32}
+AXES = ['x', 'y', 'z']
+KALMAN_COLUMNS = list(KALMAN_DTYPES)
+KALMAN_ARROW_TYPES = {col: pa.from_numpy_dtype(dtype) for col, dtype in KALMAN_DTYPES.items()}
+# the axes selected by each (x, y, z) checkbox state, all eight of them spelled out up front
+AXES_LUT = {state: tuple(axis for axis, checked in zip(AXES, state) if checked)
+            for state in product((True, False), repeat=len(AXES))}
+
+# longest trajectory sent to GL as-is; longer ones are plotted every n-th sample
+MAX_PLOT_POINTS = 20000
+
+# where per-file caches (parsed kalman_estimates tables) are kept
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'braidz_gui')
+# what a cache entry holds; part of every entry's key, so entries from a build that cached something else
+# (other columns or dtypes) are never read back. bump the version if the layout changes in any other way
+CACHE_SCHEMA = 'v2:' + ','.join(f'{col}={np.dtype(dtype).name}' for col, dtype in KALMAN_DTYPES.items())
+
+
+def parse_pair(text):
+    # a limits text box ("[-0.25, 0.25]", brackets optional) as [low, high]; ValueError unless it's exactly
+    # two numbers
+    low, _, high = text.strip('[]() ').partition(',')
+    return [float(low), float(high)]
+
+
+def cache_path(file_name, suffix):
+    # entries are named <path hash>-<version hash>. the version covers mtime, size and CACHE_SCHEMA, so an
+    # edited or replaced file gets a fresh entry, and the path part is what finds the entries it replaces
+    stat = os.stat(file_name)
+    path_key = hashlib.sha1(os.path.abspath(file_name).encode()).hexdigest()
+    version_key = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}:{CACHE_SCHEMA}".encode()).hexdigest()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"{path_key}-{version_key}{suffix}")
+
+
+def remove_quietly(path):
+    # best effort: a cache file that can't be removed (already gone, still mapped on windows) is left alone
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def open_gzip(raw):
+    # decompress raw .gz bytes: in parallel with rapidgzip or with isal when they're installed, otherwise
+    # with arrow's own C++ gzip stream (which, unlike the stdlib gzip module, doesn't run its read loop in
+    # python). buffered, for the readline in read_csv_header
+    if rapidgzip is not None:
+        return rapidgzip.open(io.BytesIO(raw), parallelization=os.cpu_count())
+    if igzip is not None:
+        return igzip.open(io.BytesIO(raw))
+    return io.BufferedReader(pa.input_stream(pa.py_buffer(raw), compression='gzip'), buffer_size=1 << 20)
+
+
+def read_feather_cache(file_name):
+    # the table parsed from file_name on an earlier open, memory-mapped, or None if there isn't a usable one.
+    # the cache is best effort throughout: a cache dir that can't be made or used is just a miss
+    try:
+        path = cache_path(file_name, '.feather')
+    except OSError:
+        return None
+    if not os.path.exists(path):
+        return None
+    try:
+        return feather.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowException):
+        # unreadable (damaged, or not written by this version); dropped, so the file is just parsed again
+        remove_quietly(path)
+        return None
+
+
+def write_feather_cache(file_name, table):
+    # uncompressed, so the next read_feather_cache can map it straight in. written to a temporary name
+    # first so an interrupted write never leaves a truncated cache entry behind. failing to write it never
+    # fails the load
+    try:
+        path = cache_path(file_name, '.feather')
+    except OSError:
+        return
+    try:
+        feather.write_feather(table, path + '.tmp', compression='uncompressed')
+        os.replace(path + '.tmp', path)
+    except (OSError, pa.ArrowException):
+        remove_quietly(path + '.tmp')
+        return
+
+    # entries are full copies of the data, so the ones this replaces (from before the file last changed, or
+    # from another schema) are deleted rather than left to pile up; nothing would ever read them again
+    prefix = os.path.basename(path).partition('-')[0] + '-'
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(prefix) and name != os.path.basename(path):
+            remove_quietly(os.path.join(CACHE_DIR, name))
+
+
+def read_csv_header(f):
+    # skip leading '#' comment lines (pyarrow has no comment option) and return the column names
+    line = f.readline()
+    while line.startswith(b'#'):
+        line = f.readline()
+    return line.decode().rstrip().split(',')
+
+
+def prepare_data(df):
+    # per-file preprocessing, done on the loading worker thread so the GUI thread never blocks on it.
+    # returns the dataframe (sorted by obj_id), the (3, N) xyz array, and per trajectory: its obj_id, an
+    # obj_id -> trajectory number lookup, the row it starts at (plus a final end row), its length and its
+    # (3, n) x/y/z extent (max - min). trajectory i is xyz[:, starts[i]:starts[i + 1]]
+
+    # group each trajectory's rows together, keeping their frame order
+    df = df.sort_values('obj_id', kind='stable', ignore_index=True)
+    ids = df['obj_id'].to_numpy()
+
+    # float32 x, y and z as the rows of one array, so each is contiguous for the filters that scan it
+    xyz = np.vstack([df[axis].to_numpy(np.float32) for axis in AXES])
+
+    starts = np.r_[0, np.flatnonzero(np.diff(ids)) + 1, len(ids)] if len(ids) else np.zeros(1, dtype=np.intp)
+    obj_ids = ids[starts[:-1]]
+    obj_index = dict(zip(obj_ids.tolist(), range(len(obj_ids))))
+    lens = np.diff(starts)
+    extents = trajectory_extents(xyz, starts)
+
+    return df, xyz, obj_ids, obj_index, starts, lens, extents
+
+
+def trajectory_extents(xyz, starts):
+    # (3, n) max - min of each coordinate of each trajectory; trajectory i is xyz[:, starts[i]:starts[i + 1]]
+    return np.maximum.reduceat(xyz, starts[:-1], axis=1) - np.minimum.reduceat(xyz, starts[:-1], axis=1)
+
+
+def trajectories_in_box(xyz, starts, keep, lower, upper):
+    # of the trajectories flagged in keep, which have at least one point strictly inside the lower/upper box.
+    # trajectory i is xyz[:, starts[i]:starts[i + 1]]
+    # the six comparisons are folded into one preallocated point mask, one contiguous row at a time, instead
+    # of materialising (3, N) temporaries, and reduced per trajectory with one ufunc reduceat
+    in_box = np.ones(xyz.shape[1], dtype=np.bool_)
+    test = np.empty_like(in_box)
+    for axis in range(3):
+        in_box &= np.greater(xyz[axis], lower[axis], out=test)
+        in_box &= np.less(xyz[axis], upper[axis], out=test)
+    return keep & np.logical_or.reduceat(in_box, starts[:-1])
+
+
+def filter_obj_ids(xyz, obj_ids, starts, lens, extents, min_obs, xlim, ylim, zlim, dist, axes):
+    # the obj_ids passing the list filters. all three are boolean masks over trajectories (indexed like
+    # obj_ids), built from the per-trajectory aggregates computed at load time; only the limits box needs a
+    # pass over the points, and that is reduced straight back to one value per trajectory. the dataframe is
+    # never sliced
+
+    # long enough
+    keep = lens >= min_obs
+
+    # travels far enough, summed over the selected axes
+    travelled = extents[[AXES.index(axis) for axis in axes]].sum(axis=0)
+    keep &= travelled >= dist
+
+    # passes through the limits box. last, since it's the only filter that looks at the points
+    lower = np.array([xlim[0], ylim[0], zlim[0]], dtype=np.float32)
+    upper = np.array([xlim[1], ylim[1], zlim[1]], dtype=np.float32)
+    keep = trajectories_in_box(xyz, starts, keep, lower, upper)
+
+    return obj_ids[keep]
+
+
+class GLCanvas(gl.GLViewWidget):
+
+    def __init__(self, parent=None, xlim=(-0.25, 0.25), ylim=(-0.25, 0.25), zlim=(0., 0.3)):
+        super(GLCanvas, self).__init__(parent)
+        self.opts['distance'] = 1
+
+        # floor grid spanning the x/y limits, 5cm spacing
+        self._grid = gl.GLGridItem()
+        self._grid.setSpacing(x=0.05, y=0.05)
+        self.addItem(self._grid)
+        self.set_limits(xlim, ylim, zlim)
+
+        # every plotted trajectory is packed into this one item, so the whole plot is one vertex buffer
+        # and one draw call however many trajectories are kept
+        self._line = gl.GLLinePlotItem(antialias=True, mode='lines')
+        self.addItem(self._line)
+        # per plotted trajectory, its vertex pairs and per-vertex colours, built once when it's added so
+        # keeping more trajectories doesn't mean re-packing the earlier ones on every selection
+        self._segments = []
+        self._colors = []
+
+    def set_limits(self, xlim, ylim, zlim):
+        # the view is only framed here, when the limits change, never per plotted trajectory
+        self.setCameraPosition(pos=QtGui.QVector3D(np.mean(xlim), np.mean(ylim), np.mean(zlim)))
+        self._grid.setSize(x=xlim[1] - xlim[0], y=ylim[1] - ylim[0])
+        self._grid.resetTransform()
+        self._grid.translate(np.mean(xlim), np.mean(ylim), zlim[0])
+
+    def plot_data(self, pos, keep=True):
+        # pos is an (N, 3) float32 array (or view). with keep, it's added to what's plotted; otherwise it
+        # replaces it
+        if not keep:
+            self._segments, self._colors = [], []
+
+        # 'lines' mode draws separate segments from consecutive vertex pairs, so each trajectory becomes its
+        # points doubled up (p0 p1, p1 p2, ...) and trajectories don't get joined to each other
+        segments = np.repeat(pos, 2, axis=0)[1:-1]
+        color = TRACE_COLORS[len(self._segments) % len(TRACE_COLORS)]
+        self._segments.append(segments)
+        self._colors.append(np.tile(np.array(color, dtype=np.float32), (len(segments), 1)))
+        self._update_line()
+
+    def clear_data(self):
+        self._segments, self._colors = [], []
+        self._update_line()
+
+    def _update_line(self):
+        self._line.setVisible(sum(len(segments) for segments in self._segments) > 0)
+        if self._line.visible():
+            self._line.setData(pos=np.concatenate(self._segments), color=np.concatenate(self._colors))
+
+
+class ObjIdModel(QtCore.QAbstractListModel):
+    """
+    List model over a numpy array of obj_ids.
 
-import matplotlib
+    Rows are formatted to strings on demand in data(), so only the visible ones ever are, and there's no
+    per-row item object.
+    """
 
-matplotlib.use('Qt5Agg')
+    def __init__(self, ids=None, parent=None):
+        super(ObjIdModel, self).__init__(parent)
+        self._ids = np.empty(0, dtype=np.uint32) if ids is None else ids
 
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
 
-class MplCanvas(FigureCanvasQTAgg):
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and index.isValid():
+            return str(self._ids[index.row()])
+        return None
 
-    def __init__(self, parent=None, width=5, height=4, dpi=100, proj='3d'):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        super(MplCanvas, self).__init__(fig)
-        if proj == '3d':
-            self.axes = fig.add_subplot(111, projection='3d')
-        else:
-            self.axes = fig.add_subplot(111)
-        self.axes.clear()
+    def obj_id(self, row):
+        return int(self._ids[row])
 
-    def plot_data(self, x, y, z):
-        self.axes.set_xlim((-0.25, 0.25))
-        self.axes.set_ylim((-0.25, 0.25))
-        self.axes.set_zlim((0., 0.3))
-        self.axes.plot(x, y, z)
+    def set_ids(self, ids):
+        self.beginResetModel()
+        self._ids = ids
+        self.endResetModel()
 
-    def plot_hist(self, vals):
-        self.axes.clear()
-        self.axes.hist(vals, bins=100, orientation='horizontal')
 
 class WorkerSignals(QtCore.QObject):
     """
@@ -77,16 +313,18 @@ class Worker(QtCore.QRunnable):
     :type callback: function
     :param args: Arguments to pass to the callback function
     :param kwargs: Keywords to pass to the callback function
+    :param signals: WorkerSignals to emit on, e.g. one shared by a stream of short tasks; a new one by default
+    :type signals: WorkerSignals
 
     """
 
-    def __init__(self, fn, *args, **kwargs):
+    def __init__(self, fn, *args, signals=None, **kwargs):
         super(Worker, self).__init__()
         # Store constructor arguments (re-used for processing)
         self.fn = fn
         self.args = args
         self.kwargs = kwargs
-        self.signals = WorkerSignals()
+        self.signals = WorkerSignals() if signals is None else signals
 
     @QtCore.pyqtSlot()
     def run(self):
@@ -116,19 +354,35 @@ class MainWindow(QtWidgets.QWidget):
         self.setGeometry(100, 100, 800, 600)
         self.file_name = None
 
-        self.df = pd.DataFrame([])
+        # start out with an empty (but correctly typed) file loaded
+        (self.df, self._xyz,
+         self._obj_ids, self._obj_index, self._obj_starts, self._obj_lens, self._obj_extents) = prepare_data(
+            pd.DataFrame({col: np.empty(0, dtype) for col, dtype in KALMAN_DTYPES.items()}))
         self.min_obs = 1000
         self.xlim = [-.25, .25]
         self.ylim = [-.25, .25]
         self.zlim = [0., 0.3]
         self.dist = 0.0
 
-        self.axes_to_filter = ['x', 'y', 'z']
+        self.axes_to_filter = AXES_LUT[True, True, True]
 
         self.keep_plot = True
 
         self.thread_pool = QtCore.QThreadPool()
 
+        # filter edits arriving in quick succession (typing, toggling checkboxes) restart this timer, so only
+        # the last one actually starts a populate worker
+        self.populate_timer = QtCore.QTimer(self)
+        self.populate_timer.setSingleShot(True)
+        self.populate_timer.setInterval(50)
+        self.populate_timer.timeout.connect(self._start_populate)
+        # every populate worker emits on these, connected once. each is numbered, and only the result of the
+        # latest one is applied, so a slower earlier run can't overwrite the list after a newer one
+        self.populate_task = 0
+        self.populate_signals = WorkerSignals()
+        self.populate_signals.result.connect(self._apply_obj_ids)
+        self.populate_failed = False
+
         self.initialize_ui()
 
     def initialize_ui(self):
@@ -208,102 +462,114 @@ class MainWindow(QtWidgets.QWidget):
         self.grid_layout.addRow("Axes", self.axes_selector)
 
         # list view
-        self.obj_list_widget = QtWidgets.QListWidget()
-        self.obj_list_widget.setSelectionMode(QtWidgets.QListWidget.SingleSelection)
-        self.obj_list_widget.itemSelectionChanged.connect(self.obj_selected)
-        #self.obj_list_widget.itemChanged.connect(self.obj_selected)
+        self.obj_list_model = ObjIdModel()
+        self.obj_list_view = QtWidgets.QListView()
+        self.obj_list_view.setModel(self.obj_list_model)
+        self.obj_list_view.setSelectionMode(QtWidgets.QListView.SingleSelection)
+        self.obj_list_view.setUniformItemSizes(True)
+        self.obj_list_view.selectionModel().selectionChanged.connect(self.obj_selected)
 
         # configure left layout
         self.left_layout.addWidget(self.open_button)
         self.left_layout.addWidget(self.status_line)
         self.left_layout.addLayout(self.grid_layout)
-        self.left_layout.addWidget(self.obj_list_widget)
+        self.left_layout.addWidget(self.obj_list_view)
 
         # define figure
-        self.traj_fig = MplCanvas(self, width=5, height=4, dpi=100)
-
-        # define statistics figure
-        self.stats_figs = QtWidgets.QVBoxLayout()
-        self.obs_hist = MplCanvas(self, width=2, height=2, dpi=100, proj='2d')
-        self.dist_hist = MplCanvas(self, width=2, height=2, dpi=100, proj='2d')
-        self.stats_figs.addWidget(self.obs_hist)
-        self.stats_figs.addWidget(self.dist_hist)
+        self.traj_fig = GLCanvas(self, xlim=self.xlim, ylim=self.ylim, zlim=self.zlim)
 
         # configure outer layout
         self.outer_layout.addLayout(self.left_layout, 1)
         self.outer_layout.addWidget(self.traj_fig, 4)
-        # self.outer_layout.addLayout(self.stats_figs, 1)
 
         # set complete layout
         self.setLayout(self.outer_layout)
 
     def axes_select(self):
-        buttons_state = [self.x_selector.isChecked(), self.y_selector.isChecked(), self.z_selector.isChecked()]
-        axes = ['x', 'y', 'z']
-        self.axes_to_filter = list(compress(axes, buttons_state))
+        axes = AXES_LUT[self.x_selector.isChecked(), self.y_selector.isChecked(), self.z_selector.isChecked()]
 
-        self.populate_list()
+        # the list only depends on the selection, so there's nothing to redo if it didn't change
+        if axes != self.axes_to_filter:
+            self.axes_to_filter = axes
+            self.populate_list()
 
     def obj_selected(self):
-        items = self.obj_list_widget.selectedItems()
-
-        for item in items:
-            obj_id = int(item.text())
-            obj_idx = (self.df['obj_id'] == obj_id).values
-            x = self.df[obj_idx]['x'].values
-            y = self.df[obj_idx]['y'].values
-            z = self.df[obj_idx]['z'].values
-
-            if not self.keep_plot:
-                self.traj_fig.axes.clear()
+        indexes = self.obj_list_view.selectionModel().selectedIndexes()
 
-            self.traj_fig.plot_data(x, y, z)
-        self.traj_fig.draw()
+        for index in indexes:
+            # the trajectory's rows are one contiguous slice, so this is a dict lookup and a view
+            i = self._obj_index[self.obj_list_model.obj_id(index.row())]
+            start, end = self._obj_starts[i], self._obj_starts[i + 1]
+            step = max(1, -(-(end - start) // MAX_PLOT_POINTS))  # ceil, so at most MAX_PLOT_POINTS are uploaded
+            self.traj_fig.plot_data(self._xyz[:, start:end:step].T, keep=self.keep_plot)
 
     def update_values(self):
 
-        # get values from textboxes
-        self.min_obs = fast_real(re.compile(r'\d+').findall(self.min_obs_widget.text())[0])
-
-        p = re.compile(r'-?\d+\.?\d?')
-        self.xlim = [fast_real(i) for i in p.findall(self.xlim_widget.text())]
-        self.ylim = [fast_real(i) for i in p.findall(self.ylim_widget.text())]
-        self.zlim = [fast_real(i) for i in p.findall(self.zlim_widget.text())]
-        self.dist = fast_real(p.findall(self.dist_widget.text())[0])
+        # get values from textboxes; nothing is changed unless they all parse
+        try:
+            min_obs = int(self.min_obs_widget.text())
+            xlim, ylim, zlim = [
+                parse_pair(widget.text()) for widget in (self.xlim_widget, self.ylim_widget, self.zlim_widget)
+            ]
+            dist = float(self.dist_widget.text())
+        except ValueError:
+            self.status_line.setText("Invalid value")
+            return
+
+        if [xlim, ylim, zlim] != [self.xlim, self.ylim, self.zlim]:
+            self.traj_fig.set_limits(xlim, ylim, zlim)
+        self.min_obs, self.xlim, self.ylim, self.zlim, self.dist = min_obs, xlim, ylim, zlim, dist
+        self.status_line.setText("Values updated")  # replaces an earlier "Invalid value"
 
         # and repopulate list
         self.populate_list()
 
     def populate_list(self):
-        # a function to populate list with cleaned obj_ids
-        # very inefficient
-
-        self.obj_list_widget.clear()
-        obj_ids = braid_slicing.get_long_obj_ids_fast_pandas(self.df, length=self.min_obs)
-
-        #self.obs_hist.plot_hist(
-        #    self.df[self.df['obj_id'].isin(obj_ids)].groupby('obj_id').size().to_numpy()
-        #)
+        # a function to populate list with cleaned obj_ids. the filtering runs on the thread pool, see
+        # _compute_obj_ids; this only (re)starts the debounce timer
+        self.populate_timer.start()
+
+    def _start_populate(self):
+        # the loaded arrays and the filter values are handed over as they are now, so the worker never sees a
+        # half-swapped file or a filter edited mid-run
+        self.populate_task += 1
+        worker = Worker(self._compute_obj_ids, self.populate_task,
+                        self._xyz, self._obj_ids, self._obj_starts, self._obj_lens, self._obj_extents,
+                        self.min_obs, self.xlim, self.ylim, self.zlim, self.dist, self.axes_to_filter,
+                        signals=self.populate_signals)
+        worker.setAutoDelete(True)
+        self.thread_pool.start(worker)
 
-        obj_ids = braid_slicing.get_middle_of_tunnel_obj_ids_fast_pandas(
-            self.df[self.df['obj_id'].isin(obj_ids)],
-            zmin=self.zlim[0], zmax=self.zlim[1],
-            ymin=self.ylim[0], ymax=self.ylim[1],
-            xmin=self.xlim[0], xmax=self.xlim[1]
-        )
+    def _compute_obj_ids(self, task, *filter_args):
+        # runs on the thread pool. a failure comes back as a result as well, tagged with its task like a list of
+        # ids is, so a stale one gets dropped the same way instead of overwriting the status of a newer run
+        try:
+            return task, filter_obj_ids(*filter_args), None
+        except Exception as error:
+            traceback.print_exc()
+            return task, None, error
 
-        obj_ids, lens = braid_slicing.get_trajectories_that_travel_far(
-            self.df[self.df['obj_id'].isin(obj_ids)],
-            axis=self.axes_to_filter,
-            dist_travelled=self.dist
-        )
+    def _apply_obj_ids(self, result):
+        task, obj_ids, error = result
+        if task != self.populate_task:
+            return  # superseded by a later populate
 
-        # self.dist_hist.plot_hist(lens)
+        if error is not None:
+            # the list keeps what it had
+            self.status_line.setText(f"Filtering failed: {type(error).__name__}: {error}")
+            self.populate_failed = True
+        else:
+            # swap the list contents in one model reset; rows are only formatted as they're drawn
+            self.obj_list_model.set_ids(obj_ids)
+            if self.populate_failed:
+                self.status_line.setText("Finished filtering")
+                self.populate_failed = False
 
-        # add the items to the list
-        self.obj_list_widget.addItems([str(obj) for obj in sorted(obj_ids)])
+        # and at this point, the list is full and we can allow setting limit values. after a failure too, so
+        # different values can be tried (on a first load they'd otherwise stay disabled)
+        self._enable_filters()
 
-        # and at this point, the list is full and we can allow setting limit values
+    def _enable_filters(self):
         self.min_obs_widget.setDisabled(False)
         self.xlim_widget.setDisabled(False)
         self.ylim_widget.setDisabled(False)
@@ -323,6 +589,7 @@ class MainWindow(QtWidgets.QWidget):
         worker = Worker(self.open_file, self.file_name)
         worker.signals.finished.connect(self.thread_complete)
         worker.signals.result.connect(self.get_data)
+        worker.setAutoDelete(True)
         self.thread_pool.start(worker)
 
     def thread_complete(self):
@@ -330,21 +597,54 @@ class MainWindow(QtWidgets.QWidget):
         self.populate_list()
 
     def get_data(self, result):
-        self.df = result
+        # the heavy lifting already happened in prepare_data on the worker thread, this only swaps it in
+        (self.df, self._xyz,
+         self._obj_ids, self._obj_index, self._obj_starts, self._obj_lens, self._obj_extents) = result
+
+        # the listed obj_ids belong to the previous file, and so does any populate still running; drop both, so
+        # a row can only ever be looked up in the file it was filtered from
+        self.populate_task += 1
+        self.obj_list_model.set_ids(np.empty(0, dtype=np.uint32))
 
     def open_file(self, file_name):
         if file_name:
             if file_name.endswith(".braidz"):
-                archive = zipfile.ZipFile(file=file_name, mode='r')
-                df = pd.read_csv(
-                    archive.open('kalman_estimates.csv.gz'),
-                    comment="#",
-                    compression="gzip")
+                table = read_feather_cache(file_name)
+                if table is None:
+                    # the .gz member is read out of the zip in one go (it's stored, not deflated, so this is a
+                    # plain copy) and inflated once, rather than streamed through zipfile's chunked reader
+                    with zipfile.ZipFile(file=file_name, mode='r') as archive:
+                        raw = archive.read('kalman_estimates.csv.gz')
+
+                    with open_gzip(raw) as f:
+                        table = pacsv.read_csv(
+                            f,
+                            read_options=pacsv.ReadOptions(column_names=read_csv_header(f),
+                                                           use_threads=True,
+                                                           block_size=8 << 20),
+                            convert_options=pacsv.ConvertOptions(
+                                include_columns=KALMAN_COLUMNS,
+                                column_types=KALMAN_ARROW_TYPES))
+                    write_feather_cache(file_name, table)
+
+                df = table.to_pandas(use_threads=True, self_destruct=True)
 
             elif file_name.endswith(".h5"):
-                df = pd.read_hdf(file_name, key='kalman_estimates', mode='r')
-
-        return df
+                # in flydra's files kalman_estimates is a plain table of records; h5py reads just the needed
+                # fields of it in one go, without pytables/pandas table introspection
+                with h5py.File(file_name, mode='r') as h5:
+                    node = h5['kalman_estimates']
+                    data = node.fields(KALMAN_COLUMNS)[:] if isinstance(node, h5py.Dataset) else None
+
+                if data is not None:
+                    df = pd.DataFrame({col: data[col].astype(dtype) for col, dtype in KALMAN_DTYPES.items()})
+                else:
+                    # written by pandas (to_hdf), where it's a group laid out the way only pandas reads back.
+                    # read whole: columns= is only accepted for format='table', not the default 'fixed'
+                    df = pd.read_hdf(file_name, key='kalman_estimates', mode='r')
+                    df = df[KALMAN_COLUMNS].astype(KALMAN_DTYPES, copy=False)
+
+        return prepare_data(df)
 
 
 if __name__ == '__main__':